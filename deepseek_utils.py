@@ -1,30 +1,19 @@
 # deepseek_utils.py
 
-import os
-import openai
 from dotenv import load_dotenv
-from openai import OpenAI
+from llm_router import LLMRouter, load_providers
 
 load_dotenv()
 
-# Read your credentials from environment variables
-DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
-
-# DeepSeek's base URL (OpenAI-compatible)
-# Official docs say you can use https://api.deepseek.com (or https://api.deepseek.com/v1)
-DEEPSEEK_API_BASE = "https://api.deepseek.com"
-
-# Configure openai for DeepSeek
-openai.api_key = DEEPSEEK_API_KEY
-openai.api_base = DEEPSEEK_API_BASE
-
-#OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+# Routes requests across the configured OpenAI-compatible providers
+# (DeepSeek first by default, see llm_router.load_providers)
+router = LLMRouter(load_providers())
 
 
 def summarize_text(transcript: str, temperature: float = 0.8) -> str:
     """
-    Calls DeepSeek's chat completion endpoint (OpenAI-compatible)
-    to summarize the given transcript into HTML.
+    Calls the chat completion endpoint of the configured LLM providers
+    (DeepSeek by default) to summarize the given transcript into HTML.
     The response contains two sections:
       - Main Takeaways & Insights
       - Detailed Summary of the Transcript
@@ -36,12 +25,6 @@ def summarize_text(transcript: str, temperature: float = 0.8) -> str:
 
 
     try:
-        # Initialize the client (DeepSeek usage)
-        client = OpenAI(
-            api_key=openai.api_key,
-            base_url=openai.api_base
-        )
-
         # Prompt with specific instructions to ensure HTML format & structure
         messages = [
             {
@@ -65,32 +48,9 @@ def summarize_text(transcript: str, temperature: float = 0.8) -> str:
             }
         ]
 
-        response = client.chat.completions.create(
-            model="deepseek-chat",
-            messages=messages,
-            temperature=temperature,
-            stream=False
-        )
-
-        # Extract the content
-        summary_html = response.choices[0].message.content
+        summary_html = router.complete(messages, temperature)
         return summary_html
 
     except Exception as e:
-        print(f"Error calling DeepSeek API: {e}")
+        print(f"Error calling LLM providers: {e}")
         return ""
-
-
-
-"""
-    client = OpenAI(api_key=OPENAI_API_KEY)
-
-response = client.chat.completions.create(
-    model="gpt-4o-mini",
-    messages=[
-        {"role": "developer", "content": "You are a helpful assistant that summarizes the given video transcript into the main takeaways and insights."},
-        {"role": "user", "content": transcript},
-    ]
-)
-
-"""
\ No newline at end of file
@@ -2,6 +2,7 @@
 import os
 import json
 import base64
+import html
 from email.mime.text import MIMEText
 
 from google.oauth2 import service_account
@@ -143,3 +144,41 @@ def send_low_credit_email(to_email: str):
     <p>Thank you for using BrainRepo!</p>
     """
     send_summary_email(to_email, subject, email_content)
+
+def build_digest_html(items: list) -> str:
+    """
+    Combines several video summaries into a single digest body.
+    Each item is a dict with "video_id", "title" and "summary".
+    The digest starts with a table of contents linking to each summary.
+    """
+    toc_entries = "".join(
+        f'<li><a href="#video-{item["video_id"]}">{html.escape(item["title"])}</a></li>'
+        for item in items
+    )
+    sections = "".join(
+        f"""
+    <hr />
+    <h2 id="video-{item['video_id']}">{html.escape(item['title'])}</h2>
+    <p><a href="https://www.youtube.com/watch?v={item['video_id']}">Watch on YouTube</a></p>
+    {clean_summary(item['summary'])}
+    """
+        for item in items
+    )
+    return f"""
+    <h2>Your New Video Summaries</h2>
+    <p>Here are the summaries of the latest videos added to your playlist.</p>
+    <h3>Contents</h3>
+    <ol>{toc_entries}</ol>
+    {sections}
+    """
+
+def send_digest_email(to_email: str, items: list):
+    """
+    Sends all the given summaries to the user in a single digest email,
+    instead of one email per video.
+    """
+    if len(items) == 1:
+        subject = f"New Video Summary: {items[0]['title']}"
+    else:
+        subject = f"Your BrainRepo Digest: {len(items)} New Video Summaries"
+    send_summary_email(to_email, subject, build_digest_html(items))
@@ -0,0 +1,247 @@
+# llm_router.py
+import os
+import json
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dotenv import load_dotenv
+from openai import OpenAI
+
+load_dotenv()
+
+# A provider is only hedged once it has this many latency samples for a p95.
+# A fixed default delay would be shorter than many full-transcript summaries,
+# so right after startup most requests would be paid for twice.
+MIN_LATENCY_SAMPLES = 5
+LATENCY_WINDOW = 50
+
+# Circuit breaker: open after N consecutive failures, retry after the cooldown
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "3"))
+CIRCUIT_COOLDOWN_SECONDS = float(os.getenv("LLM_CIRCUIT_COOLDOWN_SECONDS", "120"))
+
+# Hard limit for a single request to a provider
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "120"))
+
+# SDK retries (on 429/5xx/timeouts) for the last provider left to try.
+# Providers with a fallback fail fast so the next one is tried instead.
+LAST_PROVIDER_MAX_RETRIES = int(os.getenv("LLM_LAST_PROVIDER_MAX_RETRIES", "2"))
+
+
+class Provider:
+    """
+    An OpenAI-compatible chat completion backend, with its own latency/error
+    stats and circuit breaker state.
+    """
+
+    def __init__(self, name: str, base_url: str, api_key: str, model: str):
+        self.name = name
+        self.base_url = base_url
+        self.model = model
+        self.api_key = api_key
+        # Created on first use, so a missing API key fails the request, not the import
+        self.client = None
+
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.circuit_open_until = 0.0
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def p95_latency(self):
+        """95th percentile of recent successful latencies, or None if too few samples."""
+        with self._lock:
+            if len(self.latencies) < MIN_LATENCY_SAMPLES:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    def hedge_delay(self):
+        """Seconds to wait before hedging, or None to not hedge yet."""
+        return self.p95_latency()
+
+    def circuit_state(self) -> str:
+        """"closed", "open" (cooling down) or "half-open" (cooldown over, trial allowed or running)."""
+        with self._lock:
+            if self.consecutive_failures < CIRCUIT_FAILURE_THRESHOLD:
+                return "closed"
+            if time.monotonic() < self.circuit_open_until:
+                return "open"
+            return "half-open"
+
+    def allow_request(self) -> bool:
+        """
+        True if a request may be sent now. While half-open, only one trial
+        request is let through until it succeeds or fails.
+        """
+        with self._lock:
+            if self.consecutive_failures < CIRCUIT_FAILURE_THRESHOLD:
+                return True
+            if time.monotonic() < self.circuit_open_until or self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self.latencies.append(latency)
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.circuit_open_until = 0.0
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= CIRCUIT_FAILURE_THRESHOLD:
+                self.circuit_open_until = time.monotonic() + CIRCUIT_COOLDOWN_SECONDS
+                print(f"Circuit opened for LLM provider {self.name} for {CIRCUIT_COOLDOWN_SECONDS}s.")
+
+    def complete(self, messages: list, temperature: float, max_retries: int = 0) -> str:
+        start = time.monotonic()
+        try:
+            if self.client is None:
+                self.client = OpenAI(api_key=self.api_key, base_url=self.base_url,
+                                     timeout=REQUEST_TIMEOUT_SECONDS, max_retries=0)
+            response = self.client.with_options(max_retries=max_retries).chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                stream=False
+            )
+            content = response.choices[0].message.content
+            if not content:
+                raise ValueError("Empty response")
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success(time.monotonic() - start)
+        return content
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "model": self.model,
+            "successes": self.successes,
+            "failures": self.failures,
+            "p95LatencySeconds": self.p95_latency(),
+            "circuitState": self.circuit_state(),
+        }
+
+
+class LLMRouter:
+    """
+    Sends a chat completion to the first available provider. If it has not
+    answered by its p95 latency (or it fails), the request is also sent to the
+    next provider, and the first successful answer wins.
+    """
+
+    def __init__(self, providers: list):
+        self.providers = providers
+
+    def complete(self, messages: list, temperature: float) -> str:
+        candidates = list(self.providers)
+        # provider per future, and the time at which that future should be hedged (None = never)
+        in_flight = {}
+        hedge_at = {}
+        errors = []
+
+        # One thread per request instead of a shared pool, so slow requests that
+        # lost the race can't hold up the requests of later calls
+        executor = ThreadPoolExecutor(max_workers=max(1, len(candidates)))
+
+        def launch_next():
+            while candidates:
+                provider = candidates.pop(0)
+                if provider.allow_request():
+                    break
+            else:
+                return None
+            # With no provider left to fall back to, let the SDK retry transient errors
+            has_fallback = any(p.circuit_state() != "open" for p in candidates)
+            max_retries = 0 if has_fallback else LAST_PROVIDER_MAX_RETRIES
+            future = executor.submit(provider.complete, messages, temperature, max_retries)
+            in_flight[future] = provider
+            delay = provider.hedge_delay()
+            hedge_at[future] = time.monotonic() + delay if delay is not None else None
+            return provider
+
+        try:
+            if launch_next() is None:
+                raise RuntimeError("No LLM provider available (all circuits open)")
+
+            while in_flight:
+                # Wait until the earliest hedge time of a request still running
+                deadlines = [t for t in hedge_at.values() if t is not None]
+                timeout = None
+                if candidates and deadlines:
+                    timeout = max(0.0, min(deadlines) - time.monotonic())
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                failed = False
+                for future in done:
+                    provider = in_flight.pop(future)
+                    hedge_at.pop(future)
+                    try:
+                        return future.result()
+                    except Exception as e:
+                        print(f"LLM provider {provider.name} failed: {e}")
+                        errors.append(f"{provider.name}: {e}")
+                        failed = True
+
+                if failed:
+                    # Fall through to the next provider right away
+                    provider = launch_next()
+                    if provider:
+                        print(f"Falling back to LLM provider {provider.name}.")
+                elif not done:
+                    # A request passed its hedge time: hedge it once with the next provider
+                    now = time.monotonic()
+                    for future, deadline in hedge_at.items():
+                        if deadline is not None and deadline <= now:
+                            hedge_at[future] = None
+                    provider = launch_next()
+                    if provider:
+                        print(f"Hedging LLM request with provider {provider.name}.")
+
+            raise RuntimeError(f"All LLM providers failed: {'; '.join(errors)}")
+        finally:
+            executor.shutdown(wait=False)
+
+    def stats(self) -> list:
+        return [p.stats() for p in self.providers]
+
+
+def load_providers() -> list:
+    """
+    Reads the provider list from LLM_PROVIDERS, a JSON list like:
+      [{"name": "deepseek", "base_url": "https://api.deepseek.com",
+        "api_key_env": "DEEPSEEK_API_KEY", "model": "deepseek-chat"}, ...]
+    Without it, DeepSeek is used first and OpenAI (gpt-4o-mini) as fallback
+    when OPENAI_API_KEY is set.
+    """
+    config_str = os.getenv("LLM_PROVIDERS")
+    if config_str:
+        config = json.loads(config_str)
+    else:
+        config = [
+            {"name": "deepseek", "base_url": "https://api.deepseek.com",
+             "api_key_env": "DEEPSEEK_API_KEY", "model": "deepseek-chat"},
+        ]
+        if os.getenv("OPENAI_API_KEY"):
+            config.append({"name": "openai", "base_url": "https://api.openai.com/v1",
+                           "api_key_env": "OPENAI_API_KEY", "model": "gpt-4o-mini"})
+
+    return [
+        Provider(
+            name=entry["name"],
+            base_url=entry["base_url"],
+            api_key=os.getenv(entry.get("api_key_env", ""), entry.get("api_key", "")),
+            model=entry["model"],
+        )
+        for entry in config
+    ]
@@ -1,16 +1,19 @@
 # main.py
 import os
 import uvicorn
+from datetime import timedelta
 from fastapi import FastAPI, HTTPException, Body, Query
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 import stripe
+from firebase_admin import firestore
 
 # Local imports
 from firebase_config import db
 from youtube_utils import *
-from deepseek_utils import summarize_text
-from email_utils import send_summary_email, send_low_credit_email
+from deepseek_utils import summarize_text, router as llm_router
+from email_utils import send_summary_email, send_low_credit_email, send_digest_email
+from schedule_utils import is_playlist_due, next_schedule, playlist_fingerprint, reset_schedule_fields, utc_now
 from stripe_utils import stripe_webhook_router, portal_router
 
 app = FastAPI()
@@ -35,6 +38,12 @@ class PlaylistData(BaseModel):
     plan: str = "free"  # Default plan for new users
 
 
+class DeliveryPreference(BaseModel):
+    email: str
+    deliveryMode: str  # "instant" (one email per video) or "digest"
+    digestWindowMinutes: int = 0  # 0 = one digest per cron run
+
+
 @app.get("/")
 def root():
     return {"message": "Hello from FastAPI backend!"}
@@ -69,17 +78,22 @@ def save_playlist(data: PlaylistData = Body(...)):
             "playlistUrl": data.playlistUrl,
             "name": data.name,
             "credits": data.credits,
-            "plan": data.plan
+            "plan": data.plan,
+            **reset_schedule_fields()
         })
         user_id = new_doc_ref.id
     else:
         # Update the existing document
         user_doc = users_query[0]
         user_id = user_doc.id
-        user_doc.reference.update({
+        update_fields = {
             "playlistUrl": data.playlistUrl,
             "name": data.name
-        })
+        }
+        # A new playlist must be checked on the next cron run
+        if user_doc.to_dict().get("playlistUrl") != data.playlistUrl:
+            update_fields.update(reset_schedule_fields())
+        user_doc.reference.update(update_fields)
 
     return {"message": f"Playlist saved for user {data.email}", "userId": user_id}
 
@@ -97,10 +111,36 @@ def get_user_info(email: str = Query(..., description="User's email address")):
     return {
         "email": user_data.get("email"),
         "plan": user_data.get("plan", "free"),
-        "credits": user_data.get("credits", 0)
+        "credits": user_data.get("credits", 0),
+        "deliveryMode": user_data.get("deliveryMode", "instant"),
+        "digestWindowMinutes": user_data.get("digestWindowMinutes", 0)
     }
 
 
+@app.post("/delivery-preference")
+def save_delivery_preference(data: DeliveryPreference = Body(...)):
+    """
+    Stores how the user wants to receive summaries:
+    - "instant": one email per new video.
+    - "digest": all new summaries batched into one email, sent every cron run
+      or at most once per digestWindowMinutes.
+    """
+    if data.deliveryMode not in ("instant", "digest"):
+        raise HTTPException(status_code=400, detail="Invalid deliveryMode")
+    if data.digestWindowMinutes < 0:
+        raise HTTPException(status_code=400, detail="Invalid digestWindowMinutes")
+
+    users_query = db.collection("users").where("email", "==", data.email).limit(1).get()
+    if not users_query:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    users_query[0].reference.update({
+        "deliveryMode": data.deliveryMode,
+        "digestWindowMinutes": data.digestWindowMinutes
+    })
+    return {"message": f"Delivery preference saved for user {data.email}"}
+
+
 @app.get("/run-cron")
 def run_cron():
     """
@@ -116,6 +156,8 @@ def process_all():
 
     total_new_videos = 0
     processed_users = 0
+    skipped_users = 0
+    now = utc_now()
 
     for user_doc in all_users:
         user_data = user_doc.to_dict()
@@ -125,18 +167,33 @@ def process_all():
         user_id = user_doc.id  # We'll use this in doc keys
 
         if playlist_url and email:
+            # Summaries waiting for a digest, stored as video doc IDs
+            pending_ids = list(user_data.get("pendingDigestVideoIds", []))
+
+            # Only poll playlists whose next check time has come
+            if not is_playlist_due(user_data, now):
+                skipped_users += 1
+                # A digest window may have elapsed even if the playlist is not due
+                deliver_digest(user_doc, user_data, pending_ids, now)
+                continue
+
             processed_users += 1
             playlist_id = extract_playlist_id(playlist_url)
             if not playlist_id:
                 print(f"No valid playlist_id for {email}, skipping.")
+                deliver_digest(user_doc, user_data, pending_ids, now)
                 continue
 
             videos = get_videos_from_playlist(playlist_id)
             if not videos:
                 print(f"No videos found or error fetching playlist {playlist_id} for {email}.")
+                deliver_digest(user_doc, user_data, pending_ids, now)
                 continue
 
             print(f"Processing {len(videos)} videos for user {email} with {credits} credits.")
+            fingerprint = playlist_fingerprint(videos)
+            incomplete = False
+            delivery_mode = user_data.get("deliveryMode", "instant")
 
             for vid in videos:
                 video_id = vid["video_id"]
@@ -152,12 +209,16 @@ def process_all():
                             send_low_credit_email(email)
                         except Exception as e:
                             print(f"Error sending low credits email to {email}: {e}")
+                        # Not all videos were processed, so check again soon
+                        incomplete = True
                         # Skip processing new videos for this user
                         break
 
                     transcript = fetch_transcript_cloud(video_id)
                     if not transcript:
                         print(f"No transcript for video {video_id}, skipping.")
+                        # Transcript may not be ready yet, so check again soon
+                        incomplete = True
                         continue
 
                     summary = summarize_text(transcript)
@@ -170,25 +231,93 @@ def process_all():
                         "user_id": user_id,
                     })
 
-                    # Send the email
-                    subject = f"New Video Summary: {vid['title']}"
-                    send_summary_email(email, subject, summary)
-
-                    # Decrement credits and update Firestore
+                    # Send the email, or queue it for the digest
                     credits -= 1
-                    user_doc.reference.update({"credits": credits})
+                    if delivery_mode == "digest":
+                        pending_ids.append(composite_doc_id)
+                        # Queue and charge together, so a later error can't lose the summary
+                        user_doc.reference.update({
+                            "credits": credits,
+                            "pendingDigestVideoIds": firestore.ArrayUnion([composite_doc_id])
+                        })
+                    else:
+                        subject = f"New Video Summary: {vid['title']}"
+                        send_summary_email(email, subject, summary)
+
+                        # Decrement credits and update Firestore
+                        user_doc.reference.update({"credits": credits})
                     print(f"User {email} now has {credits} credits left.")
 
                     total_new_videos += 1
 
+            deliver_digest(user_doc, user_data, pending_ids, now)
+
+            schedule = next_schedule(user_data, fingerprint, now, incomplete)
+            user_doc.reference.update(schedule)
+            print(f"Next check for {email} in {schedule['playlistCheckIntervalMinutes']} minutes.")
+
     result = {
         "message": "Cron job completed",
         "processedUsers": processed_users,
+        "skippedUsers": skipped_users,
         "totalNewVideos": total_new_videos,
+        "llmProviders": llm_router.stats(),
     }
     print(result)
     return result
 
+def deliver_digest(user_doc, user_data, pending_ids, now):
+    """
+    Sends the summaries queued on the user document (pendingDigestVideoIds)
+    as a single digest email, then removes them from the queue.
+    In digest mode with digestWindowMinutes > 0, they stay queued until the
+    window since the last digest has elapsed. Users who switched back to
+    instant mode get their remaining queue right away.
+    """
+    if not pending_ids:
+        return
+
+    email = user_data.get("email")
+    window = 0
+    if user_data.get("deliveryMode") == "digest":
+        window = user_data.get("digestWindowMinutes", 0)
+    last_sent = user_data.get("digestLastSent")
+
+    if window > 0 and last_sent is not None and now - last_sent < timedelta(minutes=window):
+        # Window still open: keep the summaries queued for a later digest
+        return
+
+    # Load all queued summaries in one batched read (without the transcripts)
+    refs = [db.collection("videos").document(doc_id) for doc_id in pending_ids]
+    snapshots = {
+        snapshot.id: snapshot
+        for snapshot in db.get_all(refs, field_paths=["title", "summary"])
+        if snapshot.exists
+    }
+
+    items = []
+    for doc_id in pending_ids:
+        if doc_id in snapshots:
+            video_data = snapshots[doc_id].to_dict()
+            items.append({
+                "video_id": doc_id.removeprefix(f"{user_doc.id}_"),
+                "title": video_data.get("title", ""),
+                "summary": video_data.get("summary", ""),
+            })
+
+    if items:
+        try:
+            send_digest_email(email, items)
+        except Exception as e:
+            # Keep the queue, so the digest is retried on the next run
+            print(f"Error sending digest email to {email}: {e}")
+            return
+        print(f"Sent digest with {len(items)} summaries to {email}.")
+    user_doc.reference.update({
+        "pendingDigestVideoIds": firestore.ArrayRemove(pending_ids),
+        "digestLastSent": now
+    })
+
 # Set your Stripe secret key
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
 
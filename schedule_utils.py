@@ -0,0 +1,100 @@
+# schedule_utils.py
+import os
+import hashlib
+from datetime import datetime, timedelta, timezone
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Shortest gap between two checks of the same playlist. Matches the cron cadence,
+# so an active playlist is re-checked on every run.
+MIN_CHECK_INTERVAL_MINUTES = int(os.getenv("PLAYLIST_MIN_CHECK_MINUTES", "30"))
+
+# Longest gap for a dormant playlist (default: 1 day).
+MAX_CHECK_INTERVAL_MINUTES = int(os.getenv("PLAYLIST_MAX_CHECK_MINUTES", "1440"))
+
+# Each check that finds no change multiplies the interval by this factor.
+BACKOFF_FACTOR = float(os.getenv("PLAYLIST_BACKOFF_FACTOR", "2"))
+
+# How many checks in a row may end with videos left unprocessed (missing
+# transcript, no credits) and still get the minimum interval, before the
+# playlist backs off like an unchanged one.
+MAX_INCOMPLETE_RETRIES = int(os.getenv("PLAYLIST_MAX_INCOMPLETE_RETRIES", "8"))
+
+# Slack for cron jitter, so a playlist due "in a few seconds" is not pushed
+# back by a whole cron period.
+DUE_GRACE = timedelta(minutes=1)
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def playlist_fingerprint(videos: list) -> str:
+    """
+    Returns a stable hash of the playlist contents (the set of video IDs),
+    so we can tell whether a playlist changed since the last check.
+    """
+    video_ids = sorted(vid["video_id"] for vid in videos)
+    return hashlib.sha1(",".join(video_ids).encode()).hexdigest()
+
+
+def is_playlist_due(user_data: dict, now: datetime = None) -> bool:
+    """
+    True if the user's playlist should be polled in this run.
+    Playlists that were never scheduled are always due.
+    """
+    next_check = user_data.get("playlistNextCheck")
+    if next_check is None:
+        return True
+    now = now or utc_now()
+    return next_check <= now + DUE_GRACE
+
+
+def next_schedule(user_data: dict, fingerprint: str, now: datetime = None, incomplete: bool = False) -> dict:
+    """
+    Computes the schedule fields to store on the user document after a check.
+    - If the playlist changed, it is re-checked after the minimum interval.
+    - If it did not change, the previous interval is multiplied by BACKOFF_FACTOR,
+      capped at MAX_CHECK_INTERVAL_MINUTES.
+
+    Pass incomplete=True when some videos could not be processed (e.g. no
+    transcript yet, or no credits left). The playlist then keeps the minimum
+    interval for up to MAX_INCOMPLETE_RETRIES checks in a row.
+    """
+    now = now or utc_now()
+    changed = fingerprint != user_data.get("playlistFingerprint")
+
+    incomplete_runs = 0
+    if incomplete:
+        incomplete_runs = 1 if changed else user_data.get("playlistIncompleteRuns", 0) + 1
+
+    if changed or 0 < incomplete_runs <= MAX_INCOMPLETE_RETRIES:
+        interval = MIN_CHECK_INTERVAL_MINUTES
+    else:
+        previous = user_data.get("playlistCheckIntervalMinutes", MIN_CHECK_INTERVAL_MINUTES)
+        interval = min(previous * BACKOFF_FACTOR, MAX_CHECK_INTERVAL_MINUTES)
+
+    fields = {
+        "playlistFingerprint": fingerprint,
+        "playlistCheckIntervalMinutes": interval,
+        "playlistIncompleteRuns": incomplete_runs,
+        "playlistLastChecked": now,
+        "playlistNextCheck": now + timedelta(minutes=interval),
+    }
+    if changed:
+        fields["playlistLastChanged"] = now
+    return fields
+
+
+def reset_schedule_fields() -> dict:
+    """
+    Fields that make a playlist due on the next run, e.g. after the user
+    saves a new playlist URL.
+    """
+    return {
+        "playlistFingerprint": None,
+        "playlistCheckIntervalMinutes": MIN_CHECK_INTERVAL_MINUTES,
+        "playlistIncompleteRuns": 0,
+        "playlistNextCheck": None,
+    }
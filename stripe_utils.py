@@ -79,6 +79,8 @@ async def stripe_webhook(request: Request):
                 user_doc.reference.update({
                     "plan": plan_id,
                     "credits": new_credits,
+                    # Check the playlist on the next cron run, in case it backed off while out of credits
+                    "playlistNextCheck": None,
                 })
                 print(f"Updated {customer_email}: set plan={plan_id} and added {credits_to_add} credits (new total: {new_credits}).")
 
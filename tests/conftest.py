@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# The backend modules live at the repository root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
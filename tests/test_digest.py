@@ -0,0 +1,192 @@
+# tests/test_digest.py
+import sys
+import types
+from datetime import datetime, timedelta, timezone
+
+from firebase_admin import firestore
+
+
+class FakeSnapshot:
+    def __init__(self, doc_id, data):
+        self.id = doc_id
+        self._data = data
+        self.exists = data is not None
+
+    def to_dict(self):
+        return dict(self._data)
+
+
+class FakeRef:
+    def __init__(self, doc_id):
+        self.id = doc_id
+        self.updates = []
+
+    def update(self, fields):
+        self.updates.append(fields)
+
+
+class FakeCollection:
+    def document(self, doc_id):
+        return FakeRef(doc_id)
+
+
+class FakeDb:
+    """Only what deliver_digest needs: video doc refs and batched reads."""
+
+    def __init__(self):
+        self.videos = {}
+        self.get_all_calls = 0
+
+    def collection(self, name):
+        return FakeCollection()
+
+    def get_all(self, refs, field_paths=None):
+        self.get_all_calls += 1
+        for ref in refs:
+            yield FakeSnapshot(ref.id, self.videos.get(ref.id))
+
+
+class FakeUserDoc:
+    def __init__(self, doc_id):
+        self.id = doc_id
+        self.reference = FakeRef(doc_id)
+
+
+# main.py initializes Firebase from env credentials on import; use a fake db instead
+sys.modules.setdefault("firebase_config", types.SimpleNamespace(db=FakeDb()))
+
+import pytest
+
+import email_utils
+import main
+
+NOW = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    db = FakeDb()
+    db.videos = {
+        "user1_vidA": {"title": "First video", "summary": "<p>A</p>"},
+        "user1_vidB": {"title": "Second video", "summary": "<p>B</p>"},
+    }
+    monkeypatch.setattr(main, "db", db)
+    return db
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    emails = []
+    monkeypatch.setattr(main, "send_digest_email", lambda to_email, items: emails.append((to_email, items)))
+    return emails
+
+
+def test_digest_html_has_table_of_contents_and_anchors():
+    body = email_utils.build_digest_html([
+        {"video_id": "vidA", "title": "First video", "summary": "```html<p>A</p>```"},
+        {"video_id": "vidB", "title": "Second video", "summary": "<p>B</p>"},
+    ])
+
+    assert '<li><a href="#video-vidA">First video</a></li>' in body
+    assert '<li><a href="#video-vidB">Second video</a></li>' in body
+    assert '<h2 id="video-vidA">First video</h2>' in body
+    assert '<h2 id="video-vidB">Second video</h2>' in body
+    assert body.index('id="video-vidA"') < body.index('id="video-vidB"')
+    # Summaries are cleaned of code fences like single-video emails
+    assert "```" not in body
+
+
+def test_digest_html_escapes_titles():
+    body = email_utils.build_digest_html([
+        {"video_id": "vidA", "title": "<script>alert(1)</script> & more", "summary": "<p>A</p>"},
+    ])
+
+    assert "<script>" not in body
+    assert "&lt;script&gt;alert(1)&lt;/script&gt; &amp; more" in body
+
+
+def test_digest_subject(monkeypatch):
+    subjects = []
+    monkeypatch.setattr(email_utils, "send_summary_email", lambda to_email, subject, summary: subjects.append(subject))
+    items = [
+        {"video_id": "vidA", "title": "First video", "summary": "<p>A</p>"},
+        {"video_id": "vidB", "title": "Second video", "summary": "<p>B</p>"},
+    ]
+
+    email_utils.send_digest_email("user@example.com", items[:1])
+    email_utils.send_digest_email("user@example.com", items)
+
+    assert subjects == [
+        "New Video Summary: First video",
+        "Your BrainRepo Digest: 2 New Video Summaries",
+    ]
+
+
+def test_digest_waits_while_window_is_open(fake_db, sent):
+    user_doc = FakeUserDoc("user1")
+    user_data = {
+        "email": "user@example.com",
+        "deliveryMode": "digest",
+        "digestWindowMinutes": 60,
+        "digestLastSent": NOW - timedelta(minutes=30),
+    }
+
+    main.deliver_digest(user_doc, user_data, ["user1_vidA"], NOW)
+
+    assert sent == []
+    assert user_doc.reference.updates == []
+    assert fake_db.get_all_calls == 0
+
+
+def test_digest_is_sent_once_window_has_elapsed(fake_db, sent):
+    user_doc = FakeUserDoc("user1")
+    user_data = {
+        "email": "user@example.com",
+        "deliveryMode": "digest",
+        "digestWindowMinutes": 60,
+        "digestLastSent": NOW - timedelta(minutes=90),
+    }
+
+    main.deliver_digest(user_doc, user_data, ["user1_vidA", "user1_vidB"], NOW)
+
+    assert sent == [("user@example.com", [
+        {"video_id": "vidA", "title": "First video", "summary": "<p>A</p>"},
+        {"video_id": "vidB", "title": "Second video", "summary": "<p>B</p>"},
+    ])]
+    # All queued summaries are loaded in a single batched read
+    assert fake_db.get_all_calls == 1
+
+    [update] = user_doc.reference.updates
+    assert isinstance(update["pendingDigestVideoIds"], firestore.ArrayRemove)
+    assert list(update["pendingDigestVideoIds"].values) == ["user1_vidA", "user1_vidB"]
+    assert update["digestLastSent"] == NOW
+
+
+def test_leftover_queue_is_flushed_after_switching_to_instant(fake_db, sent):
+    user_doc = FakeUserDoc("user1")
+    user_data = {
+        "email": "user@example.com",
+        "deliveryMode": "instant",
+        "digestWindowMinutes": 60,
+        "digestLastSent": NOW - timedelta(minutes=5),
+    }
+
+    main.deliver_digest(user_doc, user_data, ["user1_vidA"], NOW)
+
+    assert len(sent) == 1
+    assert [item["video_id"] for item in sent[0][1]] == ["vidA"]
+    assert user_doc.reference.updates[0]["digestLastSent"] == NOW
+
+
+def test_failed_digest_keeps_queue(fake_db, monkeypatch):
+    def fail(to_email, items):
+        raise ValueError("SERVICE_ACCOUNT_JSON env variable is not set or empty.")
+
+    monkeypatch.setattr(main, "send_digest_email", fail)
+    user_doc = FakeUserDoc("user1")
+    user_data = {"email": "user@example.com", "deliveryMode": "digest"}
+
+    # Must not raise, so the cron moves on to the next user
+    main.deliver_digest(user_doc, user_data, ["user1_vidA"], NOW)
+
+    assert user_doc.reference.updates == []
@@ -0,0 +1,209 @@
+# tests/test_llm_router.py
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+import deepseek_utils
+import llm_router
+from llm_router import LLMRouter, Provider
+
+
+class MockEndpoint:
+    """
+    A local OpenAI-compatible chat completion endpoint.
+    `delay` adds latency to every request, `fail` makes every request return 500,
+    and `fail_next` makes only the next N requests return 500.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.delay = 0.0
+        self.fail = False
+        self.fail_next = 0
+        self.requests = 0
+        endpoint = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers["Content-Length"]))
+                endpoint.requests += 1
+                time.sleep(endpoint.delay)
+
+                if endpoint.fail or endpoint.fail_next > 0:
+                    endpoint.fail_next = max(0, endpoint.fail_next - 1)
+                    self.send_response(500)
+                    self.send_header("Content-Type", "application/json")
+                    self.end_headers()
+                    self.wfile.write(b'{"error": {"message": "injected failure"}}')
+                    return
+
+                body = json.dumps({
+                    "id": "chatcmpl-mock",
+                    "object": "chat.completion",
+                    "created": 0,
+                    "model": "mock",
+                    "choices": [{
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": f"<p>summary from {endpoint.name}</p>"},
+                    }],
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}/v1"
+
+    def provider(self) -> Provider:
+        return Provider(name=self.name, base_url=self.base_url, api_key="test", model="mock")
+
+
+@pytest.fixture
+def endpoints():
+    mocks = [MockEndpoint("primary"), MockEndpoint("secondary")]
+    yield mocks
+    for mock in mocks:
+        mock.server.shutdown()
+        mock.server.server_close()
+
+
+MESSAGES = [{"role": "user", "content": "transcript"}]
+
+
+def test_slow_primary_is_hedged_to_second_provider(endpoints):
+    primary, secondary = endpoints
+    router = LLMRouter([primary.provider(), secondary.provider()])
+
+    # Build up a p95 for the primary so it can be hedged
+    for _ in range(llm_router.MIN_LATENCY_SAMPLES):
+        assert router.complete(MESSAGES, 0.8) == "<p>summary from primary</p>"
+    assert secondary.requests == 0
+
+    primary.delay = 2.0
+    start = time.monotonic()
+    result = router.complete(MESSAGES, 0.8)
+
+    assert result == "<p>summary from secondary</p>"
+    assert time.monotonic() - start < 1.5
+    assert secondary.requests == 1
+
+
+def test_no_hedging_without_latency_samples(endpoints):
+    primary, secondary = endpoints
+    primary.delay = 0.5
+    router = LLMRouter([primary.provider(), secondary.provider()])
+
+    assert router.complete(MESSAGES, 0.8) == "<p>summary from primary</p>"
+    assert secondary.requests == 0
+
+
+def test_failing_primary_falls_through_to_next(endpoints):
+    primary, secondary = endpoints
+    primary.fail = True
+    router = LLMRouter([primary.provider(), secondary.provider()])
+
+    assert router.complete(MESSAGES, 0.8) == "<p>summary from secondary</p>"
+    # The primary has a fallback, so it is not retried
+    assert primary.requests == 1
+
+
+def test_last_provider_retries_transient_errors(endpoints):
+    primary, _ = endpoints
+    primary.fail_next = 1
+    router = LLMRouter([primary.provider()])
+
+    assert router.complete(MESSAGES, 0.8) == "<p>summary from primary</p>"
+    assert primary.requests == 2
+
+
+def test_circuit_opens_and_half_opens_after_cooldown(endpoints, monkeypatch):
+    monkeypatch.setattr(llm_router, "CIRCUIT_COOLDOWN_SECONDS", 0.5)
+    primary, secondary = endpoints
+    primary.fail = True
+    primary_provider = primary.provider()
+    router = LLMRouter([primary_provider, secondary.provider()])
+
+    for _ in range(llm_router.CIRCUIT_FAILURE_THRESHOLD):
+        assert router.complete(MESSAGES, 0.8) == "<p>summary from secondary</p>"
+    assert primary_provider.circuit_state() == "open"
+
+    # Circuit open: the primary is skipped entirely
+    assert router.complete(MESSAGES, 0.8) == "<p>summary from secondary</p>"
+    assert primary.requests == llm_router.CIRCUIT_FAILURE_THRESHOLD
+
+    # After the cooldown a trial request goes through and closes the circuit
+    time.sleep(0.6)
+    primary.fail = False
+    assert primary_provider.circuit_state() == "half-open"
+    assert router.complete(MESSAGES, 0.8) == "<p>summary from primary</p>"
+    assert primary_provider.consecutive_failures == 0
+    assert primary_provider.circuit_state() == "closed"
+
+
+def test_half_open_circuit_lets_a_single_trial_through(endpoints, monkeypatch):
+    monkeypatch.setattr(llm_router, "CIRCUIT_COOLDOWN_SECONDS", 0.2)
+    primary, _ = endpoints
+    primary.fail = True
+    provider = primary.provider()
+    for _ in range(llm_router.CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(Exception):
+            provider.complete(MESSAGES, 0.8)
+    assert not provider.allow_request()
+
+    time.sleep(0.3)
+    assert provider.allow_request()
+    # The trial is running, so other callers are still kept out
+    assert not provider.allow_request()
+
+    # A failed trial opens the circuit again for another cooldown
+    with pytest.raises(Exception):
+        provider.complete(MESSAGES, 0.8)
+    assert provider.circuit_state() == "open"
+
+
+def test_failed_hedge_falls_through_to_third_provider():
+    mocks = [MockEndpoint("primary"), MockEndpoint("secondary"), MockEndpoint("tertiary")]
+    primary, secondary, tertiary = mocks
+    try:
+        router = LLMRouter([mock.provider() for mock in mocks])
+        for _ in range(llm_router.MIN_LATENCY_SAMPLES):
+            router.complete(MESSAGES, 0.8)
+
+        # Slow primary gets hedged; the hedge (no latency samples yet) fails fast
+        primary.delay = 3.0
+        secondary.fail = True
+        start = time.monotonic()
+        result = router.complete(MESSAGES, 0.8)
+
+        assert result == "<p>summary from tertiary</p>"
+        assert time.monotonic() - start < 1.5
+        assert secondary.requests == 1
+    finally:
+        for mock in mocks:
+            mock.server.shutdown()
+            mock.server.server_close()
+
+
+def test_summarize_text_returns_empty_when_all_providers_fail(endpoints, monkeypatch):
+    monkeypatch.setattr(llm_router, "LAST_PROVIDER_MAX_RETRIES", 0)
+    primary, secondary = endpoints
+    primary.fail = True
+    secondary.fail = True
+    monkeypatch.setattr(deepseek_utils, "router", LLMRouter([primary.provider(), secondary.provider()]))
+
+    assert deepseek_utils.summarize_text("transcript") == ""
+    assert primary.requests == 1
+    assert secondary.requests == 1
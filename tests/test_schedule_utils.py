@@ -0,0 +1,83 @@
+# tests/test_schedule_utils.py
+from datetime import datetime, timedelta, timezone
+
+import schedule_utils
+from schedule_utils import is_playlist_due, next_schedule, playlist_fingerprint, reset_schedule_fields
+
+NOW = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+VIDEOS = [{"video_id": "a"}, {"video_id": "b"}]
+
+
+def test_fingerprint_ignores_order_and_detects_changes():
+    assert playlist_fingerprint(VIDEOS) == playlist_fingerprint(list(reversed(VIDEOS)))
+    assert playlist_fingerprint(VIDEOS) != playlist_fingerprint(VIDEOS + [{"video_id": "c"}])
+
+
+def test_never_scheduled_playlist_is_due():
+    assert is_playlist_due({}, NOW)
+    assert is_playlist_due(reset_schedule_fields(), NOW)
+
+
+def test_due_within_grace_window():
+    assert is_playlist_due({"playlistNextCheck": NOW - timedelta(minutes=5)}, NOW)
+    assert is_playlist_due({"playlistNextCheck": NOW + schedule_utils.DUE_GRACE}, NOW)
+    assert not is_playlist_due({"playlistNextCheck": NOW + schedule_utils.DUE_GRACE + timedelta(seconds=1)}, NOW)
+
+
+def test_unchanged_playlist_backs_off_up_to_max():
+    fingerprint = playlist_fingerprint(VIDEOS)
+    user_data = next_schedule({}, fingerprint, NOW)
+    assert user_data["playlistCheckIntervalMinutes"] == schedule_utils.MIN_CHECK_INTERVAL_MINUTES
+    assert user_data["playlistLastChanged"] == NOW
+
+    later = NOW
+    for _ in range(20):
+        previous = user_data["playlistCheckIntervalMinutes"]
+        later = user_data["playlistNextCheck"]
+        user_data = {**user_data, **next_schedule(user_data, fingerprint, later)}
+        expected = min(previous * schedule_utils.BACKOFF_FACTOR, schedule_utils.MAX_CHECK_INTERVAL_MINUTES)
+        assert user_data["playlistCheckIntervalMinutes"] == expected
+        assert user_data["playlistNextCheck"] == later + timedelta(minutes=expected)
+
+    assert user_data["playlistCheckIntervalMinutes"] == schedule_utils.MAX_CHECK_INTERVAL_MINUTES
+    # Nothing changed, so the change time is still the first check
+    assert user_data["playlistLastChanged"] == NOW
+
+
+def test_changed_playlist_resets_to_minimum():
+    user_data = {
+        "playlistFingerprint": playlist_fingerprint(VIDEOS),
+        "playlistCheckIntervalMinutes": schedule_utils.MAX_CHECK_INTERVAL_MINUTES,
+        "playlistLastChanged": NOW - timedelta(days=7),
+    }
+    new_fingerprint = playlist_fingerprint(VIDEOS + [{"video_id": "c"}])
+    fields = next_schedule(user_data, new_fingerprint, NOW)
+
+    assert fields["playlistCheckIntervalMinutes"] == schedule_utils.MIN_CHECK_INTERVAL_MINUTES
+    assert fields["playlistFingerprint"] == new_fingerprint
+    assert fields["playlistLastChanged"] == NOW
+
+
+def test_incomplete_playlist_retries_a_limited_number_of_times():
+    fingerprint = playlist_fingerprint(VIDEOS)
+    user_data = {
+        "playlistFingerprint": fingerprint,
+        "playlistCheckIntervalMinutes": schedule_utils.MIN_CHECK_INTERVAL_MINUTES,
+        "playlistLastChanged": NOW - timedelta(days=1),
+    }
+
+    for attempt in range(1, schedule_utils.MAX_INCOMPLETE_RETRIES + 1):
+        user_data = {**user_data, **next_schedule(user_data, fingerprint, NOW, incomplete=True)}
+        assert user_data["playlistIncompleteRuns"] == attempt
+        assert user_data["playlistCheckIntervalMinutes"] == schedule_utils.MIN_CHECK_INTERVAL_MINUTES
+
+    # Retries used up: back off like an unchanged playlist
+    user_data = {**user_data, **next_schedule(user_data, fingerprint, NOW, incomplete=True)}
+    assert user_data["playlistCheckIntervalMinutes"] > schedule_utils.MIN_CHECK_INTERVAL_MINUTES
+    # The real fingerprint is kept and the contents never counted as changed
+    assert user_data["playlistFingerprint"] == fingerprint
+    assert user_data["playlistLastChanged"] == NOW - timedelta(days=1)
+
+    # A complete check clears the retry count
+    fields = next_schedule(user_data, fingerprint, NOW)
+    assert fields["playlistIncompleteRuns"] == 0